@@ -0,0 +1,20 @@
+# analysis_config.py
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- OpenAI Model used for every analysis call ---
+# Used by the stored webhook analyses and the live analysis in app.py.
+# Recommendations in app.py use their own RECOMMENDATION_MODEL.
+ANALYSIS_MODEL = os.getenv("OPENAI_ANALYSIS_MODEL", "gpt-3.5-turbo")
+
+# --- Prompt Version ---
+# Bump this whenever the summary/sentiment/keywords prompts in webhook_receiver.py change,
+# so reanalyze_notes.py knows which stored notes are stale.
+PROMPT_VERSION = "v1"
+
+# Every stored analysis is tagged with this, e.g. "v1:gpt-3.5-turbo"
+ANALYSIS_VERSION = f"{PROMPT_VERSION}:{ANALYSIS_MODEL}"
@@ -6,10 +6,11 @@ import datetime
 import re
 import psycopg2
 import pandas as pd
-from collections import Counter
 
 from dotenv import load_dotenv
 
+from analysis_config import ANALYSIS_MODEL
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -20,6 +21,9 @@ DB_NAME = os.getenv("SUPABASE_DB_NAME")
 DB_USER = os.getenv("SUPABASE_DB_USER")
 DB_PASSWORD = os.getenv("SUPABASE_DB_PASSWORD")
 
+# --- OpenAI Model for recommendations (not stored, so not tied to ANALYSIS_MODEL) ---
+RECOMMENDATION_MODEL = "gpt-3.5-turbo"
+
 # --- OpenAI API Key ---
 openai.api_key = os.getenv("OPENAI_API_KEY")
 if not openai.api_key:
@@ -156,7 +160,7 @@ User's Learning Content to Analyze:
 """
     try:
         response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
+            model=ANALYSIS_MODEL,
             messages=[
                 {
                     "role": "system",
@@ -175,23 +179,169 @@ User's Learning Content to Analyze:
         return f"Error generating analysis: {str(e)}"
 
 # --- Functions for Theme Identification and Recommendations ---
+@st.cache_data(ttl=300, show_spinner=False)
 def get_user_theme_profile_from_db(username, num_top_themes=5):
     """
-    Loads historical notes for a specific user from Supabase and identifies top common themes
-    based on keywords.
+    Identifies a user's top common themes based on keywords.
+    The counting happens in Supabase, so only the top keywords come back.
+    Cached per username for a few minutes; errors are raised so they aren't cached.
     """
-    all_notes_df = fetch_notes_from_database(username)
-    if all_notes_df.empty:
-        return []
+    conn = get_supabase_connection_streamlit()
+    if conn is None:
+        raise ConnectionError("Could not connect to database.")
 
-    all_keywords = []
-    if 'keywords' in all_notes_df.columns:
-        for keywords_list in all_notes_df['keywords'].dropna():
-            all_keywords.extend(keywords_list)
+    cur = None
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT lower(trim(k.keyword)) AS keyword
+            FROM user_notes n
+            CROSS JOIN LATERAL unnest(n.keywords) AS k(keyword)
+            WHERE n.username = %s
+            GROUP BY 1
+            ORDER BY COUNT(*) DESC, 1
+            LIMIT %s;
+            """,
+            (username, num_top_themes)
+        )
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        if cur:
+            cur.close()
+        conn.close()
+
+# --- Time-Series Learning Analytics (aggregated in SQL, only small frames come back) ---
+# All of these filter on (username, created_at), which is covered by the index created
+# in migrate_supabase.py, so they don't scan the whole user_notes table.
+
+# Notes don't store their channel, so the source is derived from the content prefix
+# written by webhook_receiver.py ("Web Clip from ..." / "Subject: ..." / plain SMS body).
+NOTE_SOURCE_SQL = """
+    CASE
+        WHEN content LIKE 'Web Clip from %%' THEN 'web_clip'
+        WHEN content LIKE 'Subject: %%' THEN 'email'
+        ELSE 'sms'
+    END
+"""
+
+# The LLM answers with free text ("Positive.", "neutral"), so bucket it server-side.
+NOTE_SENTIMENT_SQL = """
+    CASE
+        WHEN sentiment ILIKE '%%positive%%' THEN 'positive'
+        WHEN sentiment ILIKE '%%negative%%' THEN 'negative'
+        WHEN sentiment ILIKE '%%neutral%%' THEN 'neutral'
+        ELSE 'unknown'
+    END
+"""
 
-    keyword_counts = Counter(all_keywords)
-    top_themes = [theme for theme, count in keyword_counts.most_common(num_top_themes)]
-    return top_themes
+# Start of the oldest week shown; `weeks_back` is num_weeks - 1 so the current week is included.
+TREND_WINDOW_START_SQL = "date_trunc('week', now()) - make_interval(weeks => %(weeks_back)s)"
+
+# Every week in the window, so weeks without notes show up as zero instead of being skipped.
+TREND_WEEKS_SQL = f"""
+    SELECT generate_series({TREND_WINDOW_START_SQL}, date_trunc('week', now()), interval '1 week') AS week
+"""
+
+def run_aggregate_query(cur, query, params):
+    """Runs an aggregate query on an open cursor and returns the (small) result as a DataFrame."""
+    cur.execute(query, params)
+    rows = cur.fetchall()
+    column_names = [desc[0] for desc in cur.description]
+    return pd.DataFrame(rows, columns=column_names)
+
+def fetch_weekly_note_counts(cur, params):
+    """Returns notes per week for every week in the window."""
+    query = f"""
+        WITH weeks AS ({TREND_WEEKS_SQL}),
+        counts AS (
+            SELECT date_trunc('week', created_at) AS week, COUNT(*) AS note_count
+            FROM user_notes
+            WHERE username = %(username)s
+              AND created_at >= {TREND_WINDOW_START_SQL}
+            GROUP BY 1
+        )
+        SELECT w.week, COALESCE(c.note_count, 0) AS note_count
+        FROM weeks w
+        LEFT JOIN counts c ON c.week = w.week
+        ORDER BY w.week;
+    """
+    return run_aggregate_query(cur, query, params)
+
+def fetch_weekly_keyword_trends(cur, params):
+    """
+    Returns weekly mention counts for the user's `num_keywords` most frequent keywords
+    in the window, with a zero for every week a keyword wasn't mentioned.
+    """
+    query = f"""
+        WITH weeks AS ({TREND_WEEKS_SQL}),
+        note_keywords AS (
+            SELECT
+                date_trunc('week', n.created_at) AS week,
+                lower(trim(k.keyword)) AS keyword
+            FROM user_notes n
+            CROSS JOIN LATERAL unnest(n.keywords) AS k(keyword)
+            WHERE n.username = %(username)s
+              AND n.created_at >= {TREND_WINDOW_START_SQL}
+        ),
+        top_keywords AS (
+            SELECT keyword
+            FROM note_keywords
+            GROUP BY keyword
+            ORDER BY COUNT(*) DESC, keyword
+            LIMIT %(num_keywords)s
+        ),
+        counts AS (
+            SELECT week, keyword, COUNT(*) AS mentions
+            FROM note_keywords
+            GROUP BY week, keyword
+        )
+        SELECT w.week, tk.keyword, COALESCE(c.mentions, 0) AS mentions
+        FROM weeks w
+        CROSS JOIN top_keywords tk
+        LEFT JOIN counts c ON c.week = w.week AND c.keyword = tk.keyword
+        ORDER BY w.week, tk.keyword;
+    """
+    return run_aggregate_query(cur, query, params)
+
+def fetch_sentiment_mix_by_source(cur, params):
+    """Returns each sentiment's share of the notes from each source (the sentiment mix)."""
+    query = f"""
+        SELECT
+            {NOTE_SOURCE_SQL} AS source,
+            {NOTE_SENTIMENT_SQL} AS sentiment,
+            COUNT(*)::float / SUM(COUNT(*)) OVER (PARTITION BY {NOTE_SOURCE_SQL}) AS share
+        FROM user_notes
+        WHERE username = %(username)s
+          AND created_at >= {TREND_WINDOW_START_SQL}
+        GROUP BY 1, 2
+        ORDER BY 1, 2;
+    """
+    return run_aggregate_query(cur, query, params)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_learning_trends(username, num_weeks=12, num_keywords=5):
+    """
+    Runs the three dashboard queries over one connection and returns
+    (weekly_counts_df, keyword_trends_df, sentiment_mix_df).
+    Cached per (username, num_weeks) for a few minutes; errors are raised so they aren't cached.
+    """
+    conn = get_supabase_connection_streamlit()
+    if conn is None:
+        raise ConnectionError("Could not connect to database.")
+
+    params = {"username": username, "weeks_back": num_weeks - 1, "num_keywords": num_keywords}
+    cur = None
+    try:
+        cur = conn.cursor()
+        weekly_counts_df = fetch_weekly_note_counts(cur, params)
+        keyword_trends_df = fetch_weekly_keyword_trends(cur, params)
+        sentiment_mix_df = fetch_sentiment_mix_by_source(cur, params)
+        return weekly_counts_df, keyword_trends_df, sentiment_mix_df
+    finally:
+        if cur:
+            cur.close()
+        conn.close()
 
 def generate_recommendations_with_llm(user_themes):
     """
@@ -214,7 +364,7 @@ Format your response clearly with numbered bullet points for each suggestion.
 """
     try:
         response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
+            model=RECOMMENDATION_MODEL,
             messages=[
                 {
                     "role": "system",
@@ -337,7 +487,11 @@ if st.session_state.logged_in: # This block is already within the logged-in chec
     st.markdown("---")
     st.header("Your Top Learning Themes")
     with st.spinner("Identifying your top themes..."):
-        user_top_themes = get_user_theme_profile_from_db(st.session_state.username)
+        try:
+            user_top_themes = get_user_theme_profile_from_db(st.session_state.username)
+        except Exception as e:
+            st.error(f"Error identifying themes from database: {e}")
+            user_top_themes = []
         st.session_state.user_top_themes = user_top_themes
 
     if user_top_themes:
@@ -346,6 +500,34 @@ if st.session_state.logged_in: # This block is already within the logged-in chec
     else:
         st.info("Analyze more content to build your learning theme profile!")
 
+    # --- Learning Trends Dashboard (aggregates are computed in Supabase) ---
+    st.markdown("---")
+    st.header("Your Learning Over Time")
+    trend_weeks = st.slider("Weeks to show", min_value=4, max_value=52, value=12, key="trend_weeks_slider")
+
+    with st.spinner("Crunching your learning trends..."):
+        try:
+            weekly_counts_df, keyword_trends_df, sentiment_mix_df = fetch_learning_trends(st.session_state.username, trend_weeks)
+        except Exception as e:
+            st.error(f"Error loading learning trends: {e}")
+            weekly_counts_df, keyword_trends_df, sentiment_mix_df = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    if weekly_counts_df.empty or weekly_counts_df['note_count'].sum() == 0:
+        st.info("No notes in this period yet. Your trends will appear here as you save more notes.")
+    else:
+        st.subheader("Notes per Week")
+        st.bar_chart(weekly_counts_df.set_index('week')['note_count'])
+
+        if not keyword_trends_df.empty:
+            st.subheader("Keyword Trends")
+            keyword_pivot = keyword_trends_df.pivot(index='week', columns='keyword', values='mentions').fillna(0)
+            st.line_chart(keyword_pivot)
+
+        if not sentiment_mix_df.empty:
+            st.subheader("Sentiment Mix by Source (% of notes)")
+            sentiment_pivot = sentiment_mix_df.pivot(index='source', columns='sentiment', values='share').fillna(0) * 100
+            st.bar_chart(sentiment_pivot)
+
     st.markdown("---")
     st.header("Content Recommendations for You")
     with st.spinner("Generating personalized recommendations..."):
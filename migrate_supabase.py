@@ -0,0 +1,82 @@
+# migrate_supabase.py
+# One-time schema changes for the Supabase user_notes table.
+# Safe to run again: every step uses IF NOT EXISTS.
+#
+# Usage:
+#   python migrate_supabase.py
+import os
+
+import psycopg2
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Supabase Database Credentials ---
+DB_HOST = os.getenv("SUPABASE_DB_HOST")
+DB_PORT = os.getenv("SUPABASE_DB_PORT")
+DB_NAME = os.getenv("SUPABASE_DB_NAME")
+DB_USER = os.getenv("SUPABASE_DB_USER")
+DB_PASSWORD = os.getenv("SUPABASE_DB_PASSWORD")
+
+
+def add_trend_index(cur):
+    """
+    Index for the dashboard queries in app.py, which all filter on username plus a created_at range.
+    CONCURRENTLY so user_notes keeps accepting writes while the index is built.
+    """
+    cur.execute(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS user_notes_username_created_at_idx "
+        "ON user_notes (username, created_at);"
+    )
+    print("Index 'user_notes_username_created_at_idx' created successfully (if it didn't already exist).")
+
+
+# Notes saved before versioning existed were all produced by these prompts on this model
+LEGACY_ANALYSIS_VERSION = "v1:gpt-3.5-turbo"
+
+def add_analysis_version_column(cur):
+    """
+    Adds the analysis_version tag used by webhook_receiver.py and reanalyze_notes.py,
+    and tags existing notes with the legacy version so they aren't treated as stale.
+    Notes holding an "Error: ..." analysis stay untagged so the first re-analysis run repairs them.
+    """
+    cur.execute("ALTER TABLE user_notes ADD COLUMN IF NOT EXISTS analysis_version TEXT;")
+    print("Column 'analysis_version' added successfully (if it didn't already exist).")
+
+    cur.execute(
+        """
+        UPDATE user_notes
+        SET analysis_version = %s
+        WHERE analysis_version IS NULL
+          AND COALESCE(summary, '') NOT LIKE 'Error:%%'
+          AND COALESCE(sentiment, '') NOT LIKE 'Error:%%'
+          AND NOT EXISTS (SELECT 1 FROM unnest(keywords) AS k(keyword) WHERE k.keyword LIKE 'Error:%%');
+        """,
+        (LEGACY_ANALYSIS_VERSION,)
+    )
+    print(f"Tagged {cur.rowcount} existing notes with version '{LEGACY_ANALYSIS_VERSION}'.")
+
+
+if __name__ == "__main__":
+    print(f"Migrating Supabase database: {DB_NAME}")
+
+    conn = psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    conn.autocommit = True
+
+    cur = conn.cursor()
+    try:
+        add_trend_index(cur)
+        add_analysis_version_column(cur)
+    finally:
+        cur.close()
+        conn.close()
+
+    print("Migration complete.")
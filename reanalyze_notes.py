@@ -0,0 +1,273 @@
+# reanalyze_notes.py
+#
+# Backfills stored notes after the analysis prompts or model change.
+# Notes already tagged with the current ANALYSIS_VERSION (see analysis_config.py) are skipped.
+# Each batch is committed with the new version tag, so an interrupted run simply resumes
+# with the notes that are still stale; notes whose OpenAI calls failed are retried next run.
+# Run migrate_supabase.py first so user_notes has the analysis_version column.
+#
+# Usage:
+#   python reanalyze_notes.py --dry-run        # only print the cost/time estimate
+#   python reanalyze_notes.py --workers 4 --requests-per-minute 120
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.extras import execute_batch
+
+from analysis_config import ANALYSIS_MODEL, ANALYSIS_VERSION
+from webhook_receiver import (
+    get_ai_analysis,
+    get_supabase_connection,
+    parse_keywords_response,
+)
+
+# One note = one call each for summary, sentiment and keywords (see webhook_receiver.py)
+CALLS_PER_NOTE = 3
+
+# --- Rough numbers for the up-front estimate ---
+CHARS_PER_TOKEN = 4
+PROMPT_OVERHEAD_TOKENS = 40      # system message + instruction text per call
+OUTPUT_TOKENS_PER_NOTE = 200     # summary + sentiment word + keyword list
+SECONDS_PER_CALL = 2.0           # typical chat completion latency
+
+# USD per 1K tokens (input, output). Other models need --input-price and --output-price.
+DEFAULT_PRICES_PER_1K = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+
+# --- Rate Limiter shared by all worker threads ---
+class RateLimiter:
+    """Spaces out OpenAI calls so the whole job stays under `requests_per_minute`."""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self.lock = threading.Lock()
+        self.next_allowed = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait_for = self.next_allowed - now
+            self.next_allowed = max(now, self.next_allowed) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+
+# --- Estimate ---
+def has_analysis_version_column(conn):
+    """Checks that migrate_supabase.py has added the analysis_version column."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'user_notes' AND column_name = 'analysis_version';
+            """
+        )
+        return cur.fetchone() is not None
+    finally:
+        cur.close()
+
+def estimate_job(conn, workers, requests_per_minute, input_price, output_price):
+    """Counts the stale notes server-side and estimates tokens, cost and duration for the run."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(length(content)), 0)
+            FROM user_notes
+            WHERE analysis_version IS DISTINCT FROM %s;
+            """,
+            (ANALYSIS_VERSION,)
+        )
+        note_count, total_chars = cur.fetchone()
+    finally:
+        cur.close()
+
+    total_calls = note_count * CALLS_PER_NOTE
+    input_tokens = (total_chars // CHARS_PER_TOKEN) * CALLS_PER_NOTE + total_calls * PROMPT_OVERHEAD_TOKENS
+    output_tokens = note_count * OUTPUT_TOKENS_PER_NOTE
+    cost = input_tokens / 1000 * input_price + output_tokens / 1000 * output_price
+
+    # Whichever is slower: the rate limit or the worker pool
+    rate_limited_seconds = total_calls * 60.0 / requests_per_minute
+    worker_limited_seconds = total_calls * SECONDS_PER_CALL / workers
+    seconds = max(rate_limited_seconds, worker_limited_seconds)
+
+    return {
+        "notes": note_count,
+        "calls": total_calls,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": cost,
+        "seconds": seconds,
+    }
+
+
+# --- Streaming ---
+def fetch_stale_notes_page(conn, after_id, page_size):
+    """
+    Returns the next `page_size` stale notes with an id above `after_id` (keyset paging).
+    Notes that fail in this run keep their old version but fall behind `after_id`,
+    so they are only retried on the next run.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT id, content
+            FROM user_notes
+            WHERE analysis_version IS DISTINCT FROM %s AND id > %s
+            ORDER BY id
+            LIMIT %s;
+            """,
+            (ANALYSIS_VERSION, after_id, page_size)
+        )
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+# --- Re-analysis of a single note ---
+def reanalyze_note(note, rate_limiter):
+    """Runs the current prompts on one note. Returns None if any call failed, so the note stays stale."""
+    note_id, content = note
+
+    results = {}
+    for prompt_type in ('summary', 'sentiment', 'keywords'):
+        rate_limiter.wait()
+        response = get_ai_analysis(content, prompt_type)
+        # get_ai_analysis reports failures as "Error: ..." instead of raising
+        if response.startswith("Error:"):
+            print(f"ERROR: Skipping note {note_id}, '{prompt_type}' call failed.")
+            return None
+        results[prompt_type] = response
+
+    return (
+        results['summary'],
+        results['sentiment'],
+        parse_keywords_response(results['keywords']),
+        ANALYSIS_VERSION,
+        note_id,
+    )
+
+def write_batch(conn, rows):
+    """Writes one batch of re-analyzed notes in a single round trip and commits it."""
+    cur = conn.cursor()
+    try:
+        execute_batch(
+            cur,
+            """
+            UPDATE user_notes
+            SET summary = %s, sentiment = %s, keywords = %s, analysis_version = %s
+            WHERE id = %s;
+            """,
+            rows
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+# --- Main Job ---
+def run_reanalysis(workers, requests_per_minute, batch_size, dry_run, assume_yes, input_price, output_price):
+    read_conn = get_supabase_connection()
+    write_conn = get_supabase_connection()
+    if read_conn is None or write_conn is None:
+        print("ERROR: Could not connect to Supabase. Aborting re-analysis.")
+        return
+
+    # Each read is its own short transaction, so the job never pins a snapshot
+    # while its own UPDATEs create dead row versions for vacuum to clean up.
+    read_conn.autocommit = True
+
+    try:
+        if not has_analysis_version_column(read_conn):
+            print("ERROR: user_notes has no analysis_version column. Run migrate_supabase.py first.")
+            return
+
+        estimate = estimate_job(read_conn, workers, requests_per_minute, input_price, output_price)
+
+        print(f"--- Re-analysis to version '{ANALYSIS_VERSION}' (model: {ANALYSIS_MODEL}) ---")
+        print(f"Notes to re-analyze: {estimate['notes']}")
+        print(f"OpenAI calls:        {estimate['calls']}")
+        print(f"Estimated tokens:    ~{estimate['input_tokens']} in / ~{estimate['output_tokens']} out")
+        print(f"Estimated cost:      ~${estimate['cost_usd']:.2f}")
+        print(f"Estimated time:      ~{estimate['seconds'] / 60:.1f} minutes")
+
+        if dry_run or estimate['notes'] == 0:
+            return
+        if not assume_yes and input("Proceed? [y/N] ").strip().lower() != 'y':
+            print("Re-analysis cancelled.")
+            return
+
+        rate_limiter = RateLimiter(requests_per_minute)
+
+        updated = 0
+        failed = 0
+        started_at = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            last_note_id = 0
+            while True:
+                notes = fetch_stale_notes_page(read_conn, last_note_id, batch_size)
+                if not notes:
+                    break
+                last_note_id = notes[-1][0]
+
+                results = list(executor.map(lambda note: reanalyze_note(note, rate_limiter), notes))
+                # Failed notes keep their old version, so the next run picks them up again
+                rows = [row for row in results if row is not None]
+                failed += len(results) - len(rows)
+
+                if rows:
+                    write_batch(write_conn, rows)
+                    updated += len(rows)
+
+                print(f"--- Re-analyzed {updated}/{estimate['notes']} notes ({failed} failed) ---")
+
+        elapsed = time.monotonic() - started_at
+        print(f"Re-analysis complete: {updated} updated, {failed} failed in {elapsed / 60:.1f} minutes.")
+        if failed:
+            print("Run the job again to retry the failed notes.")
+    finally:
+        read_conn.close()
+        write_conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyze stored notes with the current prompt/model version.")
+    parser.add_argument('--workers', type=int, default=4, help="Parallel OpenAI workers (default: 4)")
+    parser.add_argument('--requests-per-minute', type=int, default=60, help="OpenAI call limit across all workers (default: 60)")
+    parser.add_argument('--batch-size', type=int, default=50, help="Notes per committed database write (default: 50)")
+    parser.add_argument('--input-price', type=float, help="USD per 1K input tokens (default: known price for the model)")
+    parser.add_argument('--output-price', type=float, help="USD per 1K output tokens (default: known price for the model)")
+    parser.add_argument('--dry-run', action='store_true', help="Only print the cost and time estimate")
+    parser.add_argument('--yes', action='store_true', help="Start without asking for confirmation")
+    args = parser.parse_args()
+
+    for option in ('workers', 'requests_per_minute', 'batch_size'):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+
+    known_prices = DEFAULT_PRICES_PER_1K.get(ANALYSIS_MODEL)
+    if known_prices is None and (args.input_price is None or args.output_price is None):
+        parser.error(f"No known price for model '{ANALYSIS_MODEL}'. Pass --input-price and --output-price.")
+    input_price = args.input_price if args.input_price is not None else known_prices[0]
+    output_price = args.output_price if args.output_price is not None else known_prices[1]
+
+    run_reanalysis(
+        workers=args.workers,
+        requests_per_minute=args.requests_per_minute,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        assume_yes=args.yes,
+        input_price=input_price,
+        output_price=output_price,
+    )
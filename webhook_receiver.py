@@ -7,6 +7,8 @@ from flask import Flask, request, jsonify
 from twilio.twiml.messaging_response import MessagingResponse
 import openai # For OpenAI API calls
 
+from analysis_config import ANALYSIS_MODEL, ANALYSIS_VERSION
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -44,6 +46,7 @@ def get_supabase_connection():
         return None
 
 # --- Function to Save Note to Supabase (Unified for all inputs) ---
+# Needs the analysis_version column from migrate_supabase.py
 def save_note_to_database(content, summary, sentiment, keywords):
     """Saves processed note data to the Supabase database."""
     conn = get_supabase_connection()
@@ -60,11 +63,16 @@ def save_note_to_database(content, summary, sentiment, keywords):
         ]) + '}'
 
         insert_query = """
-        INSERT INTO user_notes (content, summary, sentiment, keywords)
-        VALUES (%s, %s, %s, %s)
+        INSERT INTO user_notes (content, summary, sentiment, keywords, analysis_version)
+        VALUES (%s, %s, %s, %s, %s)
         RETURNING id;
         """
-        cur.execute(insert_query, (content, summary, sentiment, keywords_pg_array))
+        # get_ai_analysis returns "Error: ..." instead of raising. Leave the version empty
+        # for failed analyses so reanalyze_notes.py picks the note up later.
+        analysis_failed = any(text.startswith("Error:") for text in [summary, sentiment, *keywords])
+        analysis_version = None if analysis_failed else ANALYSIS_VERSION
+
+        cur.execute(insert_query, (content, summary, sentiment, keywords_pg_array, analysis_version))
         inserted_id = cur.fetchone()[0]
         conn.commit()
         print(f"--- Note successfully saved to Supabase with ID: {inserted_id} ---")
@@ -120,7 +128,7 @@ User's Learning Content to Analyze:
 
     try:
         response = openai.chat.completions.create(
-            model="gpt-3.5-turbo", # Use the model you prefer
+            model=ANALYSIS_MODEL, # Set OPENAI_ANALYSIS_MODEL to change it (see analysis_config.py)
             messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": user_prompt}